@@ -12,6 +12,12 @@ pub static EPOCH_LENGTH: LazyLock<BlockNumber> = LazyLock::new(|| {
         .unwrap_or(100)
 });
 
+pub static STATE_SAVE_INTERVAL: LazyLock<u64> = LazyLock::new(|| {
+    env::var("STATE_SAVE_INTERVAL")
+        .map(|var| var.parse::<u64>().unwrap().max(1))
+        .unwrap_or(100)
+});
+
 pub static CHAIN_ENDPOINT: LazyLock<String> = LazyLock::new(|| {
     env::var("CHAIN_ENDPOINT").unwrap_or("wss://entrypoint-finney.opentensor.ai:443".to_owned())
 });
@@ -51,28 +51,39 @@ impl Solver {
     }
 
     fn solve(&mut self, data: &mut [AlignedChunk]) {
-        for i in 0..data.len() {
-            let mut modified_chunk = AlignedChunk::splat(0);
+        for chunk in data.iter_mut() {
+            let x = *chunk;
 
-            for j in 0..AlignedChunk::LEN {
-                let x = data[i][j];
+            // Each lane's lower neighbour, with the last word of the previous chunk carried in
+            let mut last = x.rotate_elements_right::<1>();
+            last[0] = self.last;
 
-                modified_chunk[j] =
-                    x << 1 | x << 2 | self.last >> (Word::BITS - 1) | self.last >> (Word::BITS - 2);
+            self.last = x[AlignedChunk::LEN - 1];
 
-                self.last = x;
-            }
-
-            data[i] ^= modified_chunk;
+            *chunk ^= x << 1
+                | x << 2
+                | last >> (Word::BITS - 1) as Word
+                | last >> (Word::BITS - 2) as Word;
         }
     }
+
+    fn solve_read(&mut self, buffer: &mut [AlignedChunk], len: usize) {
+        let chunk_len = len.div_ceil(size_of::<AlignedChunk>());
+
+        // Reads can end mid-word, so carry from the last byte received rather than the last word
+        let last_byte = as_u8(buffer)[len - 1];
+
+        self.solve(&mut buffer[..chunk_len]);
+
+        *self = Solver::new(last_byte);
+    }
 }
 
 fn read<T>(stream: &mut TcpStream) -> io::Result<T> {
     let mut data = MaybeUninit::<T>::uninit();
 
     unsafe {
-        stream.read(slice::from_raw_parts_mut(
+        stream.read_exact(slice::from_raw_parts_mut(
             data.as_mut_ptr() as *mut u8,
             size_of::<T>(),
         ))?;
@@ -123,21 +134,7 @@ fn handle_step_request(
             return false;
         }
 
-        let chunk_len = len.div_ceil(size_of::<AlignedChunk>());
-        let last_word_bytes = len % size_of::<AlignedChunk>();
-
-        let extra_bytes = if last_word_bytes == 0 {
-            0
-        } else {
-            size_of::<AlignedChunk>() - last_word_bytes
-        };
-
-        let word_index = AlignedChunk::LEN - (extra_bytes / size_of::<Word>()) - 1;
-        let last = buffer[chunk_len - 1][word_index];
-
-        solver.solve(&mut buffer[..chunk_len]);
-
-        solver.last = last;
+        solver.solve_read(buffer, len);
 
         let mut written = 0;
 
@@ -247,10 +244,16 @@ impl Miner {
             )
             .await?;
 
+            // UIDs rarely change for a registered hotkey, so check the last known one before scanning
             let neuron = self
                 .neurons
-                .iter()
-                .find(|&info| info.hotkey == self.account_id)
+                .get(self.uid as usize)
+                .filter(|&info| info.hotkey == self.account_id)
+                .or_else(|| {
+                    self.neurons
+                        .iter()
+                        .find(|&info| info.hotkey == self.account_id)
+                })
                 .expect("Not registered");
 
             self.last_metagraph_sync = self.current_block.number();
@@ -290,6 +293,11 @@ impl Miner {
 
                 stream.set_nonblocking(false).unwrap();
 
+                // Work is exchanged in lock-step, don't let Nagle hold back the tail of each write
+                if let Err(e) = stream.set_nodelay(true) {
+                    warn!("Could not disable Nagle's algorithm for {address}, {e}");
+                }
+
                 let message = match read::<VerificationMessage>(&mut stream) {
                     Ok(message) => message,
                     Err(error) => {
@@ -320,7 +328,7 @@ impl Miner {
                     continue;
                 }
 
-                if let Err(e) = stream.write(&SPEC_VERSION.to_le_bytes()) {
+                if let Err(e) = stream.write_all(&SPEC_VERSION.to_le_bytes()) {
                     warn!(
                         "Failed to send version to validator {}, {}",
                         message.validator.uid, e
@@ -362,8 +370,9 @@ async fn main() {
 
 #[cfg(test)]
 mod test {
-    use crate::{as_u8, AlignedChunk, Solver};
+    use crate::{as_u8, as_u8_mut, AlignedChunk, Solver};
     use num_bigint::{BigInt, Sign};
+    use std::cmp::min;
 
     const STEPS: u64 = u16::MAX as u64;
 
@@ -391,4 +400,48 @@ mod test {
             );
         }
     }
+
+    #[test]
+    fn ensure_accurate_partial_reads() {
+        let mut state = 0x9E3779B97F4A7C15u64;
+        let mut random = move || {
+            state ^= state << 13;
+            state ^= state >> 7;
+            state ^= state << 17;
+            state
+        };
+
+        let data = (0..u16::MAX).map(|_| random() as u8).collect::<Vec<_>>();
+
+        let mut last = 0u8;
+        let expected = data
+            .iter()
+            .map(|x| {
+                let result = x ^ (x << 1 | x << 2 | last >> 7 | last >> 6);
+
+                last = *x;
+
+                result
+            })
+            .collect::<Vec<_>>();
+
+        let mut solver = Solver::new(0);
+        let mut buffer = vec![AlignedChunk::splat(0); 16];
+        let mut result = Vec::with_capacity(data.len());
+
+        while result.len() < data.len() {
+            let position = result.len();
+            let len = min(random() as usize % 700 + 1, data.len() - position);
+
+            // Leave stale data past the read, as a reused socket buffer would
+            buffer.fill_with(|| AlignedChunk::splat(random()));
+            as_u8_mut(&mut buffer)[..len].copy_from_slice(&data[position..position + len]);
+
+            solver.solve_read(&mut buffer, len);
+
+            result.extend_from_slice(&as_u8(&buffer)[..len]);
+        }
+
+        assert_eq!(result, expected);
+    }
 }
@@ -18,6 +18,9 @@ pub enum IncorrectVerificationMessageInformation {
     #[error("Verification message reported miner UID as {reported} but it is {current}")]
     MismatchedUid { reported: u16, current: u16 },
 
+    #[error("Verification message reported validator UID as {0}, which is not registered")]
+    UnknownValidatorUid(u16),
+
     #[error("Verification message reported validator UID as {uid} with hotkey {reported_hotkey}, but UID {uid} is associated with hotkey {expected_hotkey}")]
     MismatchedValidatorInfo {
         uid: u16,
@@ -52,7 +55,14 @@ pub fn info_matches(
         });
     }
 
-    let expected_validator_hotkey = &neurons[message.validator.uid as usize].hotkey;
+    // Checked before the signature, so the UID can't be trusted to be in range yet
+    let Some(expected_validator) = neurons.get(message.validator.uid as usize) else {
+        return Err(
+            IncorrectVerificationMessageInformation::UnknownValidatorUid(message.validator.uid),
+        );
+    };
+
+    let expected_validator_hotkey = &expected_validator.hotkey;
     if expected_validator_hotkey != &message.validator.account_id {
         return Err(
             IncorrectVerificationMessageInformation::MismatchedValidatorInfo {
@@ -1,4 +1,4 @@
-use crate::validator::{CENTER_COLUMN_FILE, STATE_DATA_FILE};
+use crate::validator::{default_center_column_file, STATE_DATA_FILE};
 use axum::http::StatusCode;
 use axum::response::{IntoResponse, Response};
 use axum::Json;
@@ -7,14 +7,16 @@ use axum_extra::TypedHeader;
 use axum_range::{KnownSize, Ranged};
 use serde::{Deserialize, Serialize};
 use std::fmt::Display;
-use std::fs::File as SyncFile;
 use std::io;
 use thiserror::Error;
-use tokio::fs::File;
+use tokio::fs::{self, File};
 
 #[derive(Deserialize, Serialize)]
 struct MinimalState {
     step: u64,
+
+    #[serde(default = "default_center_column_file")]
+    center_column_file: String,
 }
 
 #[derive(Error, Debug)]
@@ -44,8 +46,10 @@ where
 }
 
 pub(crate) async fn current_step() -> Result<Json<u64>, ErrorWrapper<StepError>> {
-    let file = SyncFile::open(STATE_DATA_FILE).map_err(StepError::IoError)?;
-    let state = serde_json::from_reader::<_, MinimalState>(&file).map_err(StepError::ParseError)?;
+    let data = fs::read(STATE_DATA_FILE)
+        .await
+        .map_err(StepError::IoError)?;
+    let state = serde_json::from_slice::<MinimalState>(&data).map_err(StepError::ParseError)?;
 
     Ok(Json::from(state.step))
 }
@@ -53,7 +57,11 @@ pub(crate) async fn current_step() -> Result<Json<u64>, ErrorWrapper<StepError>>
 pub(crate) async fn last_n_bits(
     TypedHeader(range): TypedHeader<Range>,
 ) -> Result<Ranged<KnownSize<File>>, ErrorWrapper<io::Error>> {
-    let file = File::open(CENTER_COLUMN_FILE).await?;
+    // The center column is saved under a new name each step, so look up the current one
+    let data = fs::read(STATE_DATA_FILE).await?;
+    let state = serde_json::from_slice::<MinimalState>(&data).map_err(io::Error::from)?;
+
+    let file = File::open(state.center_column_file).await?;
     let body = KnownSize::file(file).await?;
 
     Ok(Ranged::new(Some(range), body))
@@ -8,10 +8,11 @@ use axum::routing::get;
 use axum::Router;
 use neuron::updater::Updater;
 use neuron::{config, load_env, setup_logging};
-use tracing::info;
+use tracing::{error, info};
 
 use rusttensor::wallet::{hotkey_location, load_key_seed, signer_from_seed};
 use std::net::Ipv4Addr;
+use std::process;
 use tokio;
 use tokio::net::TcpListener;
 use tokio::time::Duration;
@@ -59,7 +60,15 @@ async fn main() {
 
     tokio::task::spawn(api_main());
 
-    validator.run().await;
+    let result = validator.run().await;
+
+    if let Err(e) = &result {
+        error!("Validator stopped, {e}");
+    }
 
     opentelemetry::global::shutdown_tracer_provider();
+
+    // Worker threads wait on the work queue for as long as the validator lives, so dropping it
+    // would block on joining them
+    process::exit(if result.is_ok() { 0 } else { 1 });
 }
@@ -27,6 +27,11 @@ pub fn connect_to_miner(
         return ConnectionState::Unusable;
     }
 
+    if neuron.axon_info.ip == 0 {
+        // No axon served, a new one would be picked up as a changed axon info on the next sync
+        return ConnectionState::Unusable;
+    }
+
     let ip: IpAddr = if neuron.axon_info.ip_type == 4 {
         Ipv4Addr::from(neuron.axon_info.ip as u32).into()
     } else {
@@ -51,6 +56,14 @@ pub fn connect_to_miner(
                 return ConnectionState::Unusable;
             }
 
+            // Work is exchanged in lock-step, don't let Nagle hold back the tail of each write
+            if let Err(e) = stream.set_nodelay(true) {
+                warn!(
+                    "Could not disable Nagle's algorithm for uid {uid} at {address}, {e}",
+                    uid = neuron.uid.0
+                );
+            }
+
             let message = VerificationMessage {
                 nonce: 0,
                 netuid: *config::NETUID,
@@ -68,13 +81,13 @@ pub fn connect_to_miner(
 
             let signature = sign_message(signer, &message);
 
-            if let Err(e) = stream.write((&message).as_ref()) {
+            if let Err(e) = stream.write_all((&message).as_ref()) {
                 warn!("Failed to write to miner {uid}, {e}", uid = neuron.uid.0);
 
                 return ConnectionState::Unusable;
             };
 
-            if let Err(e) = stream.write(&signature) {
+            if let Err(e) = stream.write_all(&signature) {
                 warn!("Failed to write to miner {uid}, {e}", uid = neuron.uid.0);
 
                 return ConnectionState::Unusable;
@@ -82,7 +95,7 @@ pub fn connect_to_miner(
 
             let mut version_buffer = [0u8; size_of::<u32>()];
 
-            if let Err(e) = stream.read(&mut version_buffer) {
+            if let Err(e) = stream.read_exact(&mut version_buffer) {
                 warn!(
                     "Miner {uid} failed to report their version, {e}",
                     uid = neuron.uid.0
@@ -108,7 +121,8 @@ pub fn connect_to_miner(
                 uid = neuron.uid.0
             );
 
-            ConnectionState::Unusable
+            // Likely transient, allow reconnecting on the next sync
+            ConnectionState::Disconnected
         }
     }
 }
@@ -7,7 +7,7 @@ use crate::validator::neuron_data::{ConnectionState, NeuronData, Score};
 use crate::validator::completion_event_handler::handle_completion_events;
 use crate::validator::connection::{connect_to_miner, worker_connections, worker_count_hint};
 use crate::validator::worker::{do_work, ProcessingCompletionResult, ProcessingRequest};
-use anyhow::Result;
+use anyhow::{anyhow, Result};
 use rusttensor::api::apis;
 use rusttensor::rpc::call_runtime_api_decoded;
 use rusttensor::rpc::types::NeuronInfoLite;
@@ -18,16 +18,18 @@ use serde::{Deserialize, Serialize};
 use std::cell::SyncUnsafeCell;
 use std::cmp::min;
 use std::fs::File;
-use std::io::{ErrorKind, Read, Write};
+use std::io::{BufWriter, ErrorKind, Read, Write};
 use std::mem::transmute;
 use std::net::TcpStream;
 use std::num::NonZeroU8;
-use std::path::PathBuf;
+use std::path::{Path, PathBuf};
 use std::pin::Pin;
 use std::sync::mpmc::{Receiver, Sender};
 use std::sync::{mpmc, Arc};
 use std::time::{Duration, Instant};
-use std::{fs, mem, thread};
+use std::{fs, mem, process, thread};
+use tokio::signal::unix::{signal, SignalKind};
+use tokio::sync::watch;
 use tracing::log::warn;
 use tracing::{debug, error, info};
 
@@ -41,9 +43,13 @@ const GROW_BY: u64 = 1024 * 1024 * 8;
 const DATA_SPEC_VERSION: u32 = 5;
 const SCORE_SPEC_VERSION: u32 = 1;
 
+const STATE_DIRECTORY: &'static str = "state";
+
 pub(crate) const STATE_DATA_FILE: &'static str = "state/data.json";
-pub(crate) const CURRENT_ROW_FILE: &'static str = "state/current_row.bin";
-pub(crate) const CENTER_COLUMN_FILE: &'static str = "state/center_column.bin";
+
+// Used by states saved before row files were named by step
+const CURRENT_ROW_FILE: &'static str = "state/current_row.bin";
+const CENTER_COLUMN_FILE: &'static str = "state/center_column.bin";
 
 #[derive(Debug, Serialize, Deserialize)]
 struct KeyScoreInfo {
@@ -61,6 +67,22 @@ const fn default_version() -> u32 {
     0
 }
 
+fn default_current_row_file() -> String {
+    CURRENT_ROW_FILE.to_owned()
+}
+
+pub(crate) fn default_center_column_file() -> String {
+    CENTER_COLUMN_FILE.to_owned()
+}
+
+fn current_row_file(step: u64) -> String {
+    format!("{STATE_DIRECTORY}/current_row.{step}.bin")
+}
+
+fn center_column_file(step: u64) -> String {
+    format!("{STATE_DIRECTORY}/center_column.{step}.bin")
+}
+
 #[derive(Debug, Serialize, Deserialize)]
 struct ValidatorState {
     step: u64,
@@ -71,6 +93,12 @@ struct ValidatorState {
 
     #[serde(default = "default_version")]
     score_version: u32,
+
+    #[serde(default = "default_current_row_file")]
+    current_row_file: String,
+
+    #[serde(default = "default_center_column_file")]
+    center_column_file: String,
 }
 
 impl ValidatorState {
@@ -88,6 +116,8 @@ impl ValidatorState {
             key_info,
             version: DATA_SPEC_VERSION,
             score_version: SCORE_SPEC_VERSION,
+            current_row_file: default_current_row_file(),
+            center_column_file: default_center_column_file(),
         }
     }
 }
@@ -99,6 +129,8 @@ impl Default for ValidatorState {
             key_info: Vec::new(),
             version: DATA_SPEC_VERSION,
             score_version: SCORE_SPEC_VERSION,
+            current_row_file: default_current_row_file(),
+            center_column_file: default_center_column_file(),
         }
     }
 }
@@ -135,8 +167,13 @@ impl Validator {
     fn find_neuron_info<'a>(
         neurons: &'a [NeuronInfoLite],
         account_id: &AccountId,
+        last_uid: Option<u16>,
     ) -> Option<&'a NeuronInfoLite> {
-        neurons.iter().find(|neuron| &neuron.hotkey == account_id)
+        // UIDs rarely change for a registered hotkey, so check the last known one before scanning
+        last_uid
+            .and_then(|uid| neurons.get(uid as usize))
+            .filter(|neuron| &neuron.hotkey == account_id)
+            .or_else(|| neurons.iter().find(|neuron| &neuron.hotkey == account_id))
     }
 
     fn not_registered(account_id: &AccountId) -> ! {
@@ -179,7 +216,7 @@ impl Validator {
             .await
             .unwrap();
 
-        let neuron_info = Self::find_neuron_info(&neurons, signer.account_id());
+        let neuron_info = Self::find_neuron_info(&neurons, signer.account_id(), None);
         let last_block_fetch = Instant::now();
 
         let neuron_info = if let Some(neuron_info) = neuron_info {
@@ -191,10 +228,10 @@ impl Validator {
         let mut state =
             Self::load_state(neurons.iter().map(|neuron| neuron.hotkey.clone())).unwrap();
 
-        fs::create_dir_all("state").unwrap();
+        fs::create_dir_all(STATE_DIRECTORY).unwrap();
 
         if state.version != DATA_SPEC_VERSION {
-            let result = fs::remove_file(CURRENT_ROW_FILE);
+            let result = fs::remove_file(&state.current_row_file);
 
             if let Err(e) = &result {
                 if e.kind() != ErrorKind::NotFound {
@@ -202,7 +239,7 @@ impl Validator {
                 }
             }
 
-            let result = fs::remove_file(CENTER_COLUMN_FILE);
+            let result = fs::remove_file(&state.center_column_file);
 
             if let Err(e) = &result {
                 if e.kind() != ErrorKind::NotFound {
@@ -218,10 +255,10 @@ impl Validator {
         let current_row_size = Self::current_row_file_size(state.step) as usize;
         let center_column_size = Self::center_column_file_size(state.step) as usize;
 
-        let mut current_row = if fs::exists(CURRENT_ROW_FILE).unwrap() {
+        let mut current_row = if fs::exists(&state.current_row_file).unwrap() {
             let mut current_row = Vec::with_capacity(current_row_size);
 
-            let mut current_row_file = File::open(CURRENT_ROW_FILE).unwrap();
+            let mut current_row_file = File::open(&state.current_row_file).unwrap();
 
             current_row_file.read_to_end(&mut current_row).unwrap();
 
@@ -230,10 +267,10 @@ impl Validator {
             vec![0; current_row_size]
         };
 
-        let mut center_column = if fs::exists(CENTER_COLUMN_FILE).unwrap() {
+        let mut center_column = if fs::exists(&state.center_column_file).unwrap() {
             let mut current_row = Vec::with_capacity(center_column_size);
 
-            let mut current_row_file = File::open(CENTER_COLUMN_FILE).unwrap();
+            let mut current_row_file = File::open(&state.center_column_file).unwrap();
 
             current_row_file.read_to_end(&mut current_row).unwrap();
 
@@ -357,25 +394,55 @@ impl Validator {
         }
     }
 
-    fn save_state(&mut self) -> Result<()> {
-        let path = PathBuf::from(STATE_DATA_FILE);
+    fn write_temporary(
+        path: &str,
+        write: impl FnOnce(&mut BufWriter<File>) -> Result<()>,
+    ) -> Result<String> {
+        let temporary_path = format!("{path}.tmp");
 
-        {
-            let mut file = File::create(CURRENT_ROW_FILE)?;
+        let mut writer = BufWriter::new(File::create(&temporary_path)?);
 
-            file.write_all(self.current_row.get_mut())?;
-        }
+        write(&mut writer)?;
 
-        {
-            let mut file = File::create(CENTER_COLUMN_FILE)?;
+        // Make sure the contents are durable before the file can be renamed into place
+        writer.into_inner()?.sync_all()?;
 
-            file.write_all(&self.center_column)?;
-        }
+        Ok(temporary_path)
+    }
 
-        if let Some(parent) = path.parent() {
-            fs::create_dir_all(parent)?;
+    fn remove_stale_row_files(current_row_file: &str, center_column_file: &str) -> Result<()> {
+        for entry in fs::read_dir(STATE_DIRECTORY)? {
+            let path = entry?.path();
+
+            let Some(name) = path.file_name().and_then(|name| name.to_str()) else {
+                continue;
+            };
+
+            // Also catches temporary files left behind by a save that was cut short
+            let is_row_file =
+                name.starts_with("current_row.") || name.starts_with("center_column.");
+
+            if is_row_file
+                && path != Path::new(current_row_file)
+                && path != Path::new(center_column_file)
+            {
+                fs::remove_file(&path)?;
+            }
         }
 
+        Ok(())
+    }
+
+    fn save_state(&mut self) -> Result<()> {
+        let path = PathBuf::from(STATE_DATA_FILE);
+
+        fs::create_dir_all(STATE_DIRECTORY)?;
+
+        // Rows are saved under new names for each step, so the rename of data.json is the single
+        // point at which the saved state moves from one step to the next
+        let current_row_file = current_row_file(self.step);
+        let center_column_file = center_column_file(self.step);
+
         let state = ValidatorState {
             key_info: self
                 .neurons
@@ -389,11 +456,36 @@ impl Validator {
             step: self.step,
             version: DATA_SPEC_VERSION,
             score_version: SCORE_SPEC_VERSION,
+            current_row_file,
+            center_column_file,
         };
 
-        let json = serde_json::to_string(&state)?;
+        // Each file is still swapped in whole, as saving twice at one step rewrites the files
+        // the current data.json refers to
+        let current_row = Self::write_temporary(&state.current_row_file, |writer| {
+            Ok(writer.write_all(self.current_row.get_mut())?)
+        })?;
+
+        let center_column = Self::write_temporary(&state.center_column_file, |writer| {
+            Ok(writer.write_all(&self.center_column)?)
+        })?;
+
+        let data = Self::write_temporary(STATE_DATA_FILE, |writer| {
+            Ok(serde_json::to_writer(writer, &state)?)
+        })?;
+
+        fs::rename(&current_row, &state.current_row_file)?;
+        fs::rename(&center_column, &state.center_column_file)?;
+        fs::rename(&data, &path)?;
+
+        File::open(STATE_DIRECTORY)?.sync_all()?;
 
-        fs::write(&path, json)?;
+        // Only once data.json no longer refers to them can the previous step's rows go
+        if let Err(e) =
+            Self::remove_stale_row_files(&state.current_row_file, &state.center_column_file)
+        {
+            warn!("Failed to remove stale state files, {e}");
+        }
 
         Ok(())
     }
@@ -493,7 +585,8 @@ impl Validator {
             )
             .await?;
 
-            let neuron_info = Self::find_neuron_info(&neurons, self.signer.account_id());
+            let neuron_info =
+                Self::find_neuron_info(&neurons, self.signer.account_id(), Some(self.uid));
 
             let neuron_info = if let Some(neuron_info) = neuron_info {
                 neuron_info
@@ -503,43 +596,44 @@ impl Validator {
 
             self.uid = neuron_info.uid.0;
 
-            // Update changed hotkeys
-            for i in 0..self.neurons.len() {
-                let neuron = &mut self.neurons[i];
-
-                if neuron.info.hotkey != neurons[i].hotkey {
-                    let info = neurons[i].clone();
-
-                    self.neurons[i] = NeuronData {
-                        score: Score::default().into(),
-                        weight: NonZeroU8::MAX,
-                        connection: connect_to_miner(
-                            &self.signer,
-                            self.uid,
-                            &info,
-                            false,
-                            &self.metrics,
-                        )
-                        .into(),
-                        info,
-                    };
-                } else {
-                    if matches!(neuron.connection.get_mut(), ConnectionState::Disconnected)
-                        || neurons[i].axon_info != neuron.info.axon_info
+            // Update changed hotkeys, connecting in parallel as each unreachable miner can take the
+            // full connect timeout
+            let signer = &self.signer;
+            let uid = self.uid;
+            let metrics = &self.metrics;
+
+            thread::scope(|scope| {
+                for (neuron, info) in self.neurons.iter_mut().zip(neurons.iter()) {
+                    if neuron.info.hotkey != info.hotkey {
+                        scope.spawn(move || {
+                            *neuron = NeuronData {
+                                score: Score::default().into(),
+                                weight: NonZeroU8::MAX,
+                                connection: connect_to_miner(signer, uid, info, false, metrics)
+                                    .into(),
+                                info: info.clone(),
+                            };
+                        });
+                    } else if matches!(neuron.connection.get_mut(), ConnectionState::Disconnected)
+                        || info.axon_info != neuron.info.axon_info
                     {
-                        neuron.connection = connect_to_miner(
-                            &self.signer,
-                            self.uid,
-                            &neurons[i],
-                            matches!(*neuron.score.get_mut(), Score::Cheater),
-                            &self.metrics,
-                        )
-                        .into()
+                        scope.spawn(move || {
+                            neuron.connection = connect_to_miner(
+                                signer,
+                                uid,
+                                info,
+                                matches!(*neuron.score.get_mut(), Score::Cheater),
+                                metrics,
+                            )
+                            .into();
+
+                            neuron.info = info.clone();
+                        });
+                    } else {
+                        neuron.info = info.clone();
                     }
-
-                    neuron.info = neurons[i].clone();
                 }
-            }
+            });
 
             // Update scores array size if needed
             if self.neurons.len() != neurons.len() {
@@ -602,7 +696,7 @@ impl Validator {
         Ok(set_weights)
     }
 
-    async fn do_step(&mut self) -> Result<()> {
+    async fn do_step(&mut self, shutdown: &mut watch::Receiver<bool>) -> Result<()> {
         let start = Instant::now();
 
         let mut elapsed_blocks = self.current_block.number()
@@ -630,7 +724,11 @@ impl Validator {
 
                 warn!("No connections available, sleeping for {blocks} to resync");
 
-                tokio::time::sleep(Duration::from_secs(blocks as u64 * 12)).await;
+                // Don't sleep through a shutdown
+                tokio::select! {
+                    _ = tokio::time::sleep(Duration::from_secs(blocks as u64 * 12)) => {}
+                    _ = shutdown.changed() => {}
+                }
             } else {
                 warn!("No connections available, retrying");
             }
@@ -665,25 +763,34 @@ impl Validator {
         let weight_sum: u32 = worker_connections.iter().map(|x| x.weight as u32).sum();
 
         let mut position = 0;
+        let mut cumulative_weight = 0;
 
         let mut worker_connections = worker_connections.into_iter();
 
         for connection in &mut worker_connections {
-            let chunk_size = (byte_count * connection.weight as u64).div_ceil(weight_sum as u64);
+            cumulative_weight += connection.weight as u64;
 
-            if chunk_size == 0 {
-                continue;
-            }
+            // Cut at cumulative boundaries, so cache line rounding can't starve the last miners
+            let end = (byte_count * cumulative_weight).div_ceil(weight_sum as u64);
 
-            let cache_line_size_remainder = chunk_size % 64;
+            let cache_line_size_remainder = end % 64;
 
-            let chunk_size = if cache_line_size_remainder == 0 {
-                chunk_size
+            let end = if cache_line_size_remainder == 0 {
+                end
             } else {
-                chunk_size - cache_line_size_remainder + 64
+                end - cache_line_size_remainder + 64
             };
 
-            let end = min(position + chunk_size, byte_count);
+            let end = min(end, byte_count);
+
+            self.available_worker_sender
+                .send((connection.uid, connection.stream))
+                .expect("Available worker channel should not be closed");
+
+            if end == position {
+                continue;
+            }
+
             let range = position..end;
 
             debug!("Adding {range:?} to work queue");
@@ -692,10 +799,6 @@ impl Validator {
                 .send(ProcessingRequest::new(range, self.current_row.get_mut()))
                 .expect("Work queue channel should not be closed");
 
-            self.available_worker_sender
-                .send((connection.uid, connection.stream))
-                .expect("Available worker channel should not be closed");
-
             position = end;
 
             if end == byte_count {
@@ -751,7 +854,10 @@ impl Validator {
 
         self.step += 1;
 
-        self.save_state()?;
+        // Rewriting the whole row every step makes saving quadratic, so only do it periodically
+        if self.step % *config::STATE_SAVE_INTERVAL == 0 {
+            self.save_state()?;
+        }
 
         self.metrics.evolution_steps.record(self.step, &[]);
 
@@ -762,8 +868,49 @@ impl Validator {
         Ok(())
     }
 
-    pub(crate) async fn run(&mut self) {
+    pub(crate) async fn run(&mut self) -> Result<()> {
+        let mut interrupt = signal(SignalKind::interrupt())?;
+        let mut terminate = signal(SignalKind::terminate())?;
+
+        let (shutdown_sender, mut shutdown) = watch::channel(false);
+
+        // Steps can't be cancelled mid-way as their completion wait blocks, so only flag the
+        // shutdown for the evolution loop to act on between steps
+        tokio::spawn(async move {
+            tokio::select! {
+                _ = interrupt.recv() => {}
+                _ = terminate.recv() => {}
+            }
+
+            info!("Received shutdown signal, stopping after the current step");
+
+            let _ = shutdown_sender.send(true);
+
+            tokio::select! {
+                _ = interrupt.recv() => {}
+                _ = terminate.recv() => {}
+            }
+
+            warn!("Received a second shutdown signal, exiting without saving state");
+
+            process::exit(130);
+        });
+
+        let result = self.evolve(&mut shutdown).await;
+
+        if let Err(e) = self.save_state() {
+            error!("Failed to save state, {e}");
+        }
+
+        result
+    }
+
+    async fn evolve(&mut self, shutdown: &mut watch::Receiver<bool>) -> Result<()> {
         loop {
+            if *shutdown.borrow() {
+                return Ok(());
+            }
+
             if self.last_block_fetch.elapsed() > Duration::from_secs(12) {
                 let block = match self.subtensor.blocks().at_latest().await {
                     Ok(block) => block,
@@ -775,7 +922,7 @@ impl Validator {
 
                         tokio::time::sleep(Duration::from_secs(12)).await;
 
-                        return;
+                        return Err(anyhow!("Failed to fetch block, {e}"));
                     }
                 };
 
@@ -794,7 +941,7 @@ impl Validator {
                 );
             }
 
-            if let Err(e) = self.do_step().await {
+            if let Err(e) = self.do_step(shutdown).await {
                 error!("Error during evolution step {step}, {e}", step = self.step);
             }
         }
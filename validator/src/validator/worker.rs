@@ -11,6 +11,7 @@ use std::slice;
 use tracing::{debug, warn};
 
 const VALIDATION_CHANCE: f32 = 0.05;
+const BUFFER_SIZE: usize = 8 * 4 * 1024;
 
 #[derive(Debug)]
 pub struct ProcessingRequest {
@@ -41,11 +42,35 @@ pub struct ProcessingCompletionResult {
     pub state: ProcessingCompletionState,
 }
 
-fn verify_result(original: &[u8], mut last: u8, result: &[u8]) -> bool {
-    for (i, x) in original.iter().enumerate() {
+fn verify_result(original: &[u8], last: u8, result: &[u8]) -> bool {
+    let mut original_words = original.chunks_exact(size_of::<u64>());
+    let mut result_words = result[..original.len()].chunks_exact(size_of::<u64>());
+
+    // Verify a whole word at a time, shifts carry across the bytes of a word for free
+    let mut last_word = (last as u64) << (u64::BITS - u8::BITS);
+
+    for (x, result) in (&mut original_words).zip(&mut result_words) {
+        let x = u64::from_le_bytes(x.try_into().unwrap());
+        let expected =
+            x ^ (x << 1 | x << 2 | last_word >> (u64::BITS - 1) | last_word >> (u64::BITS - 2));
+
+        if u64::from_le_bytes(result.try_into().unwrap()) != expected {
+            return false;
+        }
+
+        last_word = x;
+    }
+
+    let mut last = (last_word >> (u64::BITS - u8::BITS)) as u8;
+
+    for (x, result) in original_words
+        .remainder()
+        .iter()
+        .zip(result_words.remainder())
+    {
         let expected = x ^ (x << 1 | x << 2 | last >> 7 | last >> 6);
 
-        if result[i] != expected {
+        if *result != expected {
             return false;
         }
 
@@ -63,10 +88,23 @@ fn read_len(
     mut last: u8,
     uid: u16,
 ) -> Option<usize> {
+    let verify = random::<u16>() as f32 / (u16::MAX as f32) < VALIDATION_CHANCE;
+
+    if verify {
+        debug!("Verifying results of {uid}");
+    }
+
     let mut read = 0;
 
     while read < length {
-        let len = match stream.read(&mut buffer[..length - read]) {
+        // Only verified results need the original kept to compare against, the rest are read in place
+        let destination = if verify {
+            &mut buffer[..length - read]
+        } else {
+            &mut output[read..length]
+        };
+
+        let len = match stream.read(destination) {
             Ok(len) => {
                 if len == 0 {
                     warn!("Failed to read from miner {uid} connection");
@@ -83,17 +121,15 @@ fn read_len(
             }
         };
 
-        if random::<u16>() as f32 / (u16::MAX as f32) < VALIDATION_CHANCE {
-            debug!("Verifying results of {uid}");
-
+        if verify {
             if !verify_result(&output[read..read + len], last, &buffer[..len]) {
                 return None;
             }
-        }
 
-        last = output[read + len - 1];
+            last = output[read + len - 1];
 
-        (&mut output[read..read + len]).copy_from_slice(&buffer[..len]);
+            (&mut output[read..read + len]).copy_from_slice(&buffer[..len]);
+        }
 
         read += len;
     }
@@ -103,15 +139,12 @@ fn read_len(
 
 fn handle_connection(
     work_chunk: &mut [u8],
+    buffer: &mut [u8],
     connection: &'static mut TcpStream,
     request: ProcessingRequest,
     uid: u16,
 ) -> ProcessingCompletionState {
-    let buffer_size = 8 * 4 * 1024;
-
-    let mut buffer = Vec::with_capacity(buffer_size);
-
-    unsafe { buffer.set_len(buffer_size) }
+    let buffer_size = buffer.len();
 
     let iterations = work_chunk.len().div_ceil(buffer_size);
 
@@ -129,7 +162,7 @@ fn handle_connection(
         )
     };
 
-    if let Err(e) = connection.write(network_request) {
+    if let Err(e) = connection.write_all(network_request) {
         warn!("Failed to request data processing from miner {uid}, {e}");
 
         return ProcessingCompletionState::Failed(0, request, Duration::new(0, 0));
@@ -184,7 +217,7 @@ fn handle_connection(
 
             let read = read_len(
                 connection,
-                &mut buffer,
+                buffer,
                 &mut work_chunk[write_from..write_from + written],
                 written,
                 last,
@@ -222,6 +255,11 @@ pub fn do_work(
     work_queue_receiver: Receiver<ProcessingRequest>,
     completion_sender: Sender<ProcessingCompletionResult>,
 ) {
+    // Reused across requests, as each worker only ever handles one connection at a time
+    let mut buffer = Vec::with_capacity(BUFFER_SIZE);
+
+    unsafe { buffer.set_len(BUFFER_SIZE) }
+
     loop {
         let request = work_queue_receiver.recv().unwrap();
 
@@ -235,10 +273,50 @@ pub fn do_work(
             &mut (*current_row.get())[request.range.start as usize..request.range.end as usize]
         };
 
-        let state = handle_connection(work_chunk, connection, request, uid);
+        let state = handle_connection(work_chunk, &mut buffer, connection, request, uid);
 
         completion_sender
             .send(ProcessingCompletionResult { state, uid })
             .expect("Completion event channel should not be closed");
     }
 }
+
+#[cfg(test)]
+mod test {
+    use crate::validator::worker::verify_result;
+
+    fn solve_bytes(original: &[u8], mut last: u8) -> Vec<u8> {
+        original
+            .iter()
+            .map(|x| {
+                let result = x ^ (x << 1 | x << 2 | last >> 7 | last >> 6);
+
+                last = *x;
+
+                result
+            })
+            .collect()
+    }
+
+    #[test]
+    fn ensure_accurate_verification() {
+        let original = (0..259u32)
+            .map(|i| (i.wrapping_mul(2654435761) >> 13) as u8)
+            .collect::<Vec<_>>();
+
+        for len in 0..original.len() {
+            for last in [0, 0b01000000, 0b10000000, u8::MAX] {
+                let original = &original[..len];
+                let mut result = solve_bytes(original, last);
+
+                assert!(verify_result(original, last, &result));
+
+                if let Some(byte) = result.last_mut() {
+                    *byte ^= 1;
+
+                    assert!(!verify_result(original, last, &result));
+                }
+            }
+        }
+    }
+}